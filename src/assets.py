@@ -1,15 +1,20 @@
 import os
 import json
 import logging
+import threading
 from io import BytesIO
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Union, Sequence
+from typing import Dict, List, Set, Tuple, Union, Sequence
 
 import pygame
 
 from surface import Surface
 
 
+logger = logging.getLogger(__name__)
+
+
 Asset = Union[Sequence[pygame.Surface], bytes]
 
 img_formats = [
@@ -18,14 +23,51 @@ img_formats = [
 ]
 
 
+# render scales are snapped to multiples of this step so the number of
+# distinct scale factors (and thereby cached asset copies) stays small
+RENDER_SCALE_STEP = 0.125
+
+
+def snap_render_scale(value: float) -> float:
+    return max(RENDER_SCALE_STEP, round(value / RENDER_SCALE_STEP) * RENDER_SCALE_STEP)
+
+
 class Assets:
     _abs_path: Path = None
     _meta_data: Dict[Path, dict] = {}
     _assets: Dict[Path, Asset] = {}
+    _scaled: Dict[Tuple[Path, float], Sequence[pygame.Surface]] = {}
+
+    # the render scales images are pre-scaled for when they are loaded
+    # so the game never has to scale them while rendering
+    _scales: Set[float] = set()
+
+    # scenes map to the asset directories they need. every directory is
+    # loaded as a group which is reference counted across all scenes.
+    # since groups can be nested the paths inside them are reference
+    # counted as well and only removed once no group holds them.
+    _lock = threading.RLock()
+    _scenes: Dict[str, Sequence[Path]] = {}
+    _groups: Dict[Path, List[Path]] = {}
+    _ref_counts: Dict[Path, int] = {}
+    _path_refs: Dict[Path, int] = {}
+
+    # scenes are streamed one after another on a single background thread
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
 
 
     @classmethod
-    def _read_all_files(cls, prefix: Path) -> None:
+    def _read_all_files(cls,
+            prefix: Path,
+            assets: Dict[Path, Asset] = None,
+            meta_data: Dict[Path, dict] = None,
+        ) -> None:
+        
+        if assets is None:
+            assets = cls._assets
+        if meta_data is None:
+            meta_data = cls._meta_data
+
         # this will only map all files into a list and load json files
         for sub_path in os.listdir(prefix):
             curr_path = Path(prefix, sub_path)
@@ -38,13 +80,13 @@ class Assets:
                     # the metadata must be preloaded before handling
                     # images due the order of which files are handled
                     if curr_path.name == "meta.json":
-                        cls._meta_data[relative_path] = json.load(file)
+                        meta_data[relative_path] = json.load(file)
                     else:
-                        cls._assets[relative_path] = file.read()
+                        assets[relative_path] = file.read()
             
             # if it's a directory loop through it
             elif curr_path.is_dir():
-                cls._read_all_files(curr_path)
+                cls._read_all_files(curr_path, assets, meta_data)
             
             else:
                 raise OSError(f"{relative_path} is not a valid path")
@@ -92,16 +134,283 @@ class Assets:
         # convert all files with image format extensions to pygame surfaces
         for path, data in cls._assets.items():
             if path.suffix[1:] in img_formats:
-                logging.debug(f"loading image {path}")
+                logger.debug("loading image %s", path)
                 meta = cls._meta_data.get(Path(path.parent, "meta.json"), {})
                 cls._assets[path] = cls._load_surface(data, meta)
 
+        cls._scaled.update(cls._prescale(cls._assets, cls._scales))
+
+
+    @classmethod
+    def set_root(cls, prefix_path: Path) -> None:
+        if not prefix_path.is_dir():
+            raise ValueError("unable to locate directory: %s" % prefix_path)
+        
+        cls._abs_path = prefix_path
+
+
+    @classmethod
+    def load_manifest(cls, manifest: Dict[str, Sequence[str]]) -> None:
+        # the manifest maps scene names to the directories relative to the
+        # asset root which they need, e.g. {"level_1": ["player", "level_1"]}.
+        # directories shared between scenes are only loaded once and stay
+        # loaded as long as any scene using them is loaded.
+        with cls._lock:
+            for scene, directories in manifest.items():
+                cls._scenes[scene] = [Path(directory) for directory in directories]
+
+
+    @classmethod
+    def load_group(cls, directory: Path) -> None:
+        if isinstance(directory, str):
+            directory = Path(directory)
+
+        with cls._lock:
+            if cls._abs_path is None:
+                raise RuntimeError("asset root must be set before loading groups")
+
+            if cls._ref_counts.get(directory, 0) > 0:
+                cls._ref_counts[directory] += 1
+                return
+
+        # read and convert the files outside of the lock so the
+        # game can keep fetching loaded assets while streaming
+        group_path = Path(cls._abs_path, directory)
+        if not group_path.is_dir():
+            raise ValueError("unable to locate directory: %s" % group_path)
+        
+        assets: Dict[Path, Asset] = {}
+        meta_data: Dict[Path, dict] = {}
+        cls._read_all_files(group_path, assets, meta_data)
+
+        for path, data in assets.items():
+            if path.suffix[1:] in img_formats:
+                logger.debug("loading image %s", path)
+                meta = meta_data.get(Path(path.parent, "meta.json"), {})
+                assets[path] = cls._load_surface(data, meta)
+
+        with cls._lock:
+            scales = set(cls._scales)
+        scaled = cls._prescale(assets, scales)
+
+        with cls._lock:
+            # another thread might have loaded the group in the meantime
+            if cls._ref_counts.get(directory, 0) > 0:
+                cls._ref_counts[directory] += 1
+                return
+            
+            logger.debug("loaded asset group %s", directory)
+            
+            # keep the existing objects for paths already loaded
+            # by another group so references to them stay valid
+            for path, asset in assets.items():
+                if path not in cls._assets:
+                    cls._assets[path] = asset
+                    
+                    # the scales might have changed while pre-scaling
+                    for scale in cls._scales:
+                        if (path, scale) in scaled:
+                            cls._scaled[(path, scale)] = scaled[(path, scale)]
+            for path, meta in meta_data.items():
+                cls._meta_data.setdefault(path, meta)
+            
+            paths = list(assets.keys()) + list(meta_data.keys())
+            for path in paths:
+                cls._path_refs[path] = cls._path_refs.get(path, 0) + 1
+            
+            cls._groups[directory] = paths
+            cls._ref_counts[directory] = 1
+
+
+    @classmethod
+    def unload_group(cls, directory: Path) -> None:
+        if isinstance(directory, str):
+            directory = Path(directory)
+
+        with cls._lock:
+            if cls._ref_counts.get(directory, 0) == 0:
+                raise ValueError("asset group is not loaded: %s" % directory)
+            
+            cls._ref_counts[directory] -= 1
+            if cls._ref_counts[directory] > 0:
+                return
+            
+            logger.debug("unloading asset group %s", directory)
+            del cls._ref_counts[directory]
+            
+            # only remove paths which aren't part of another loaded group
+            paths = set()
+            for path in cls._groups.pop(directory):
+                cls._path_refs[path] -= 1
+                if cls._path_refs[path] == 0:
+                    del cls._path_refs[path]
+                    paths.add(path)
+            
+            for path in paths:
+                cls._assets.pop(path, None)
+                cls._meta_data.pop(path, None)
+            
+            for key in [key for key in cls._scaled if key[0] in paths]:
+                del cls._scaled[key]
+
+
+    @classmethod
+    def _get_scene(cls, scene: str) -> Sequence[Path]:
+        with cls._lock:
+            if scene not in cls._scenes:
+                raise ValueError("no scene with name: %s" % scene)
+            return cls._scenes[scene]
+
+
+    @classmethod
+    def load_scene(cls, scene: str) -> None:
+        loaded = []
+        try:
+            for directory in cls._get_scene(scene):
+                cls.load_group(directory)
+                loaded.append(directory)
+        except Exception:
+            # release the groups acquired so far if any group fails
+            for directory in reversed(loaded):
+                cls.unload_group(directory)
+            raise
+
+
+    @classmethod
+    def unload_scene(cls, scene: str) -> None:
+        for directory in cls._get_scene(scene):
+            cls.unload_group(directory)
+
+
+    @classmethod
+    def stream_scene(cls, scene: str) -> Future:
+        # load the assets of the next scene in the background while the
+        # current scene keeps playing. check the returned future before
+        # switching to the scene, its result raises if loading failed.
+        directories = cls._get_scene(scene)
+        logger.debug("streaming assets for scene %s: %s", scene, directories)
+
+        future = cls._executor.submit(cls.load_scene, scene)
+        future.add_done_callback(lambda future: cls._log_stream_error(scene, future))
+        return future
+
+
+    @classmethod
+    def _log_stream_error(cls, scene: str, future: Future) -> None:
+        if future.cancelled():
+            return
+        
+        error = future.exception()
+        if error is not None:
+            logger.error("unable to stream assets for scene %s", scene, exc_info=error)
+
+
+    @classmethod
+    def scene_loaded(cls, scene: str) -> bool:
+        directories = cls._get_scene(scene)
+        with cls._lock:
+            return all(cls._ref_counts.get(directory, 0) > 0 for directory in directories)
+
 
     @classmethod
     def get(cls, path: Path) -> Asset:
         if isinstance(path, str):
             path = Path(path)
 
-        if path not in cls._assets:
-            raise ValueError("no asset with path: %s" % path)
-        return cls._assets.get(path)
\ No newline at end of file
+        with cls._lock:
+            if path not in cls._assets:
+                raise ValueError("no asset with path: %s" % path)
+            return cls._assets.get(path)
+
+
+    @classmethod
+    def _scale_frames(cls, frames: Sequence[pygame.Surface], scale: float) -> Sequence[pygame.Surface]:
+        scaled_frames = []
+        for frame in frames:
+            w, h = frame.get_size()
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            scaled_frames.append(pygame.transform.smoothscale(frame, size))
+        
+        return scaled_frames
+
+
+    @classmethod
+    def _prescale(cls,
+            assets: Dict[Path, Asset],
+            scales: Set[float],
+        ) -> Dict[Tuple[Path, float], Sequence[pygame.Surface]]:
+        
+        scaled = {}
+        for path, frames in assets.items():
+            if isinstance(frames, bytes):
+                continue
+            
+            for scale in scales:
+                logger.debug("scaling image %s by %s", path, scale)
+                scaled[(path, scale)] = cls._scale_frames(frames, scale)
+        
+        return scaled
+
+
+    @classmethod
+    def set_scales(cls, scales: Sequence[float]) -> None:
+        # sets the render scales images are pre-scaled for. copies of
+        # other scales are dropped and the images already loaded are
+        # scaled for the new ones, so this shouldn't run while drawing.
+        scales = {snap_render_scale(scale) for scale in scales} - {1}
+
+        with cls._lock:
+            cls._scales = scales
+            for key in list(cls._scaled):
+                if key[1] not in scales:
+                    del cls._scaled[key]
+            
+            missing = {
+                path: frames for path, frames in cls._assets.items()
+                if any((path, scale) not in cls._scaled for scale in scales)
+            }
+        
+        scaled = cls._prescale(missing, scales)
+
+        with cls._lock:
+            for (path, scale), frames in scaled.items():
+                # skip images unloaded or scales dropped in the meantime
+                if path in cls._assets and scale in cls._scales:
+                    cls._scaled.setdefault((path, scale), frames)
+
+
+    @classmethod
+    def get_scaled(cls, path: Path, scale: float) -> Sequence[pygame.Surface]:
+        if isinstance(path, str):
+            path = Path(path)
+
+        frames = cls.get(path)
+        if isinstance(frames, bytes):
+            raise ValueError("asset is not an image: %s" % path)
+
+        scale = snap_render_scale(scale)
+        if scale == 1:
+            return frames
+
+        key = (path, scale)
+        with cls._lock:
+            if key in cls._scaled:
+                return cls._scaled[key]
+        
+        # only scales outside of the pre-scaled ones end up here. there are
+        # few snapped scales so caching these as well stays bounded.
+        scaled_frames = cls._scale_frames(frames, scale)
+        
+        with cls._lock:
+            # skip caching if the group was unloaded while scaling
+            if path in cls._assets:
+                cls._scaled.setdefault(key, scaled_frames)
+                return cls._scaled[key]
+
+        return scaled_frames
+
+
+    @classmethod
+    def clear_scaled(cls) -> None:
+        with cls._lock:
+            cls._scaled.clear()
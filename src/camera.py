@@ -7,9 +7,12 @@ import cv2
 import numpy as np
 
 
+logger = logging.getLogger(__name__)
+
+
 class Camera:
     def __init__(self, device: int) -> None:
-        logging.debug("connecting to capture device id: %s" % device)
+        logger.debug("connecting to capture device id: %s", device)
         
         if sys.platform == "win32":
             self._cap = cv2.VideoCapture(device, cv2.CAP_DSHOW)
@@ -23,7 +26,7 @@ class Camera:
 
 
     def _close_capture(self) -> None:
-        logging.debug("releasing video capture device")
+        logger.debug("releasing video capture device")
         self._cap.release()
 
 
@@ -49,7 +52,7 @@ class Camera:
         ret, frame = self._cap.read()
 
         if not ret:
-            logging.warning_msg("unable to read from capture device")
+            logger.warning("unable to read from capture device")
             return
 
         return cv2.flip(frame, 1)
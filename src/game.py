@@ -1,26 +1,196 @@
-import json
 import logging
-from pathlib import Path
+import threading
 
 import pygame
 
 from window import Window
+from profiler import StartupProfile
+
+
+logger = logging.getLogger(__name__)
+
+
+# seconds to wait for the tracker loader and thread when quitting
+LOADER_JOIN_TIMEOUT = 1.0
 
 
 class Game:
-    def __init__(self, abs_path: Path) -> None:
-        with open(Path(abs_path, "..", "config", "default.json"), "r") as file:
-            self._game_config = json.load(file)
+    def __init__(self, config: dict, profile_startup: bool = False) -> None:
+        self._game_config = config
+        
+        self._profile_startup = profile_startup
         
-        self._window = Window(self._game_config["window"])
+        with StartupProfile.stage("create window"):
+            self._window = Window(self._game_config["window"])
+
+        # the camera and motion tracker are created in the background
+        # since importing mediapipe and creating the pose model takes a
+        # while. until it's done the window shows a splash screen.
+        self._camera = None
+        self._tracker = None
+        self._stopping = threading.Event()
+        self._loader_lock = threading.Lock()
+        self._tracker_modes = None
+
+        # the tracker runs throttled in menus, at full rate during
+        # gameplay and is paused while the window isn't focused
+        self._playing = False
+        self._focused = True
+
+        self._loader = threading.Thread(
+            target=self._load_tracker,
+            daemon=True
+        )
+        self._loader.start()
     
 
+    def _load_tracker(self) -> None:
+        config = self._game_config.get("tracker")
+        if config is None:
+            StartupProfile.mark("tracker disabled")
+            return
+        
+        # the loader checks between stages whether the game
+        # was closed during the splash screen and gives up
+        camera = None
+        try:
+            with StartupProfile.stage("import tracker"):
+                from camera import Camera
+                from tracker import MotionTracker, MODE_PAUSED, MODE_THROTTLED, MODE_FULL
+
+            if self._stopping.is_set():
+                StartupProfile.mark("tracker cancelled")
+                return
+
+            with StartupProfile.stage("open camera"):
+                camera = Camera(config.get("device", 0))
+            
+            if self._stopping.is_set():
+                self._cancel_loading(camera)
+                return
+            
+            with StartupProfile.stage("create pose model"):
+                tracker = MotionTracker(camera, config.get("accuracy", 1))
+                tracker.throttle_rate = config.get("menu_rate", 10)
+            
+            if self._stopping.is_set():
+                self._cancel_loading(camera)
+                return
+            
+            with StartupProfile.stage("warm up pose model"):
+                tracker.warm_up()
+        
+        except Exception as e:
+            logger.exception(e)
+            if camera is not None:
+                camera.close()
+            
+            StartupProfile.mark("tracker failed")
+            return
+        
+        with self._loader_lock:
+            if self._stopping.is_set():
+                self._cancel_loading(camera)
+                return
+            
+            self._camera = camera
+            self._tracker = tracker
+            self._tracker_modes = (MODE_PAUSED, MODE_THROTTLED, MODE_FULL)
+            
+            self._update_tracker_mode()
+            tracker.start_thread()
+        
+        StartupProfile.mark("tracker ready")
+
+
+    def _cancel_loading(self, camera) -> None:
+        camera.close()
+        StartupProfile.mark("tracker cancelled")
+
+
+    @property
+    def playing(self) -> bool:
+        return self._playing
+
+
+    @playing.setter
+    def playing(self, value: bool) -> None:
+        if not isinstance(value, bool):
+            raise TypeError("playing must be a bool")
+        
+        self._playing = value
+        with self._loader_lock:
+            self._update_tracker_mode()
+
+
+    def _update_tracker_mode(self) -> None:
+        # must be called while holding the loader lock
+        if self._tracker is None:
+            return
+        
+        paused, throttled, full = self._tracker_modes
+        if not self._focused:
+            mode = paused
+        elif self._playing:
+            mode = full
+        else:
+            mode = throttled
+        
+        if self._tracker.mode != mode:
+            self._tracker.mode = mode
+
+
+    def _shutdown(self) -> None:
+        self._stopping.set()
+
+        # a stage which is still running can't be interrupted, the daemon
+        # thread is left behind and cleans up once the stage is done
+        self._loader.join(LOADER_JOIN_TIMEOUT)
+        if self._loader.is_alive():
+            logger.warning("tracker loader is still running while shutting down")
+
+        with self._loader_lock:
+            if self._tracker is not None:
+                # a camera read can hang e.g. after unplugging the camera
+                # so don't wait for the tracker thread indefinitely
+                try:
+                    self._tracker.stop_thread(LOADER_JOIN_TIMEOUT)
+                except RuntimeError as e:
+                    logger.warning("unable to stop the tracker: %s", e)
+                
+                self._camera.close()
+
+
     def main_loop(self) -> None:
+        loading = True
         running = True
+        
+        self._window.draw_splash("Loading...")
+        self._window.update()
+        StartupProfile.mark("first frame")
+
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    logging.debug("exiting game main loop")
+                    logger.debug("exiting game main loop")
                     running = False
+                
+                elif event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWFOCUSGAINED):
+                    self._focused = event.type == pygame.WINDOWFOCUSGAINED
+                    with self._loader_lock:
+                        self._update_tracker_mode()
             
-            self._window.update()
\ No newline at end of file
+            if loading:
+                if self._loader.is_alive():
+                    self._window.draw_splash("Loading...")
+                else:
+                    loading = False
+
+                    if self._profile_startup:
+                        report = StartupProfile.report()
+                        logger.info("startup profile:\n%s", report)
+                        print(report)
+
+            self._window.update()
+        
+        self._shutdown()
@@ -1,12 +1,78 @@
 import time
+import json
+import atexit
+import argparse
 import datetime
 import logging
+import logging.handlers
+import threading
+from queue import Queue
 from pathlib import Path
 
-from game import Game
+from profiler import StartupProfile
 
 
-def set_logging(abs_path: Path):
+class RateLimitFilter(logging.Filter):
+    # lets through one record per message template and interval so
+    # repeated per frame warnings (e.g. a failing camera read) don't
+    # flood the log. errors and above are never limited. messages must
+    # be logged lazily e.g. logger.debug("reading %s", path) since the
+    # unformatted message is used to tell records apart.
+    def __init__(self, interval: float = 5.0) -> None:
+        super().__init__()
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._last_emitted = {}
+        self._suppressed = {}
+        self._last_pruned = time.monotonic()
+
+
+    def _prune(self, now: float) -> None:
+        # forget messages which weren't repeated within the interval. ones
+        # with suppressed repeats are kept a while longer so the count can
+        # still be reported. pruning runs at most once per interval to keep
+        # the filter cheap for every record.
+        if now - self._last_pruned < self._interval:
+            return
+        
+        self._last_pruned = now
+        for key, last_emitted in list(self._last_emitted.items()):
+            expiry = self._interval * (2 if key in self._suppressed else 1)
+            if now - last_emitted >= expiry:
+                del self._last_emitted[key]
+                self._suppressed.pop(key, None)
+
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+
+        with self._lock:
+            last_emitted = self._last_emitted.get(key)
+            if last_emitted is not None and now - last_emitted < self._interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            
+            self._last_emitted[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+
+            self._prune(now)
+        
+        if suppressed:
+            record.msg = "%s (suppressed %i similar messages)" % (record.msg, suppressed)
+        
+        return True
+
+
+def load_config(abs_path: Path) -> dict:
+    with open(Path(abs_path, "..", "config", "default.json"), "r") as file:
+        return json.load(file)
+
+
+def set_logging(abs_path: Path, config: dict):
     log_dir = Path(abs_path, "logs")
     
     if not log_dir.is_dir():
@@ -21,21 +87,61 @@ def set_logging(abs_path: Path):
 
     log_file = Path(log_dir, filename)
 
-    logging.basicConfig(
-        level="NOTSET",
-        filename=log_file,
-        filemode="w",
-        format="%(asctime)s | %(levelname)-8s | %(message)s",
+    # only the background listener thread writes to the log file. the
+    # game and tracker threads just put their records onto the queue.
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=config.get("max_bytes", 5 * 1024 * 1024),
+        backupCount=config.get("backup_count", 3),
+    )
+    file_handler.setFormatter(logging.Formatter(
+        fmt="%(asctime)s | %(levelname)-8s | %(name)-8s | %(message)s",
         datefmt="[%H:%M:%S]",
+    ))
+
+    log_queue = Queue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(config.get("rate_limit", 5.0)))
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+
+    # flush the remaining records when the game exits
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(config.get("level", "DEBUG"))
+    root.addHandler(queue_handler)
+
+    # every module logs to a logger named after it so the
+    # level can be set per subsystem e.g. {"camera": "WARNING"}
+    for name, level in config.get("levels", {}).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print the import and init times of the startup stages"
     )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     try:
+        args = parse_args()
+
         abs_path = Path(__file__).resolve().parent
-        set_logging(abs_path)
+        config = load_config(abs_path)
+        set_logging(abs_path, config.get("logging", {}))
+
+        # the game is imported here so importing pygame is part of the profile
+        with StartupProfile.stage("import game"):
+            from game import Game
 
-        game = Game(abs_path)
+        game = Game(config, args.profile_startup)
         game.main_loop()
     except (Exception, KeyboardInterrupt) as e:
         logging.exception(e)
\ No newline at end of file
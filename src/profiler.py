@@ -0,0 +1,44 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupProfile:
+    # the reference point for all timings is the
+    # moment this module was first imported
+    _start: float = time.perf_counter()
+    _lock = threading.Lock()
+    _stages: List[Tuple[str, float, float]] = []
+
+
+    @classmethod
+    @contextmanager
+    def stage(cls, name: str):
+        # measure the duration of the code run inside the context
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with cls._lock:
+                cls._stages.append((name, start - cls._start, end - start))
+
+
+    @classmethod
+    def mark(cls, name: str) -> None:
+        # record a point in time without a duration
+        with cls._lock:
+            cls._stages.append((name, time.perf_counter() - cls._start, 0.0))
+
+
+    @classmethod
+    def report(cls) -> str:
+        with cls._lock:
+            stages = sorted(cls._stages, key=lambda stage: stage[1])
+
+        lines = ["%-28s %10s %10s" % ("stage", "start ms", "took ms")]
+        for name, start, duration in stages:
+            lines.append("%-28s %10.1f %10.1f" % (name, start * 1000, duration * 1000))
+
+        return "\n".join(lines)
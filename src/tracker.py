@@ -1,6 +1,8 @@
+import math
+import time
 import logging
 import threading
-from typing import Union, Tuple
+from typing import List, Union, Tuple
 
 import cv2
 import numpy as np
@@ -9,6 +11,9 @@ import mediapipe as mp
 from camera import Camera
 
 
+logger = logging.getLogger(__name__)
+
+
 LEFT_SHOULDER   = 11
 LEFT_ELBOW      = 13
 LEFT_WRIST      = 15
@@ -26,29 +31,86 @@ connections = (
 )
 
 
+# run modes of the motion tracker thread
+MODE_PAUSED     = 0
+MODE_THROTTLED  = 1
+MODE_FULL       = 2
+
+
+# size of the downsampled grayscale sample used to detect motion
+GATE_SAMPLE_SIZE = (32, 32)
+
+# padding in pixels added around the landmarks when sampling for motion
+GATE_ROI_PADDING = 60
+
+
+tracked_landmarks = (
+    LEFT_SHOULDER,
+    LEFT_ELBOW,
+    LEFT_WRIST,
+    RIGHT_SHOULDER,
+    RIGHT_ELBOW,
+    RIGHT_WRIST,
+)
+
+
 class MotionTracker:
     def __init__(self,
             camera: Camera,
             accuracy: int = 1,
             show_landmarks: bool = False,
             landmarks_color: tuple = (255, 255, 255),
+            region: Tuple[float, float] = (0.0, 1.0),
+            motion_threshold: float = 2.0,
+            max_skip: int = 10,
         ) -> None:
         
+        if max_skip < 0:
+            raise ValueError("max_skip must be a value of 0 or higher")
+        if not 0 <= region[0] < region[1] <= 1:
+            raise ValueError("region must be a horizontal span between 0 and 1")
+
         # create a threading lock used for making the motion
         # tracker thread safe when reading/writing to memory
         self._lock = threading.Lock()
+
+        # a separate lock is held while the pose solution is running
+        # so it can't be swapped out or closed during an inference
+        self._pose_lock = threading.Lock()
         
         self._camera = camera
         
         self._running = False
+        self._thread = None
         self._current_frame = None
         self._last_processed = None
         self._landmarks = None
         self._accuracy = accuracy
         self._show_landmarks = False
         self._landmarks_color = landmarks_color
-
-        # use the property setters for the constructor arguments
+        self._region = tuple(region)
+
+        # motion gating reuses the previous landmarks as long as the
+        # sampled area around them doesn't change beyond the threshold
+        self._motion_threshold = motion_threshold
+        self._max_skip = max_skip
+        self._gate_roi = None
+        self._gate_sample = None
+        self._skip_count = 0
+        self._skipped_frames = 0
+        self._processed_frames = 0
+
+        # the tracker thread sleeps while paused or between updates
+        # when throttled and is woken up early by the wake event
+        self._mode = MODE_FULL
+        self._throttle_rate = 10
+        self._wake = threading.Event()
+        self._busy_time = 0.0
+        self._duty_start = time.perf_counter()
+
+        # use the property setters for the constructor arguments. the
+        # accuracy setter also creates the mediapipe pose solution.
+        self._mp_pose = None
         self.accuracy = accuracy
         self.show_landmarks = show_landmarks
 
@@ -56,9 +118,6 @@ class MotionTracker:
         self._width = width
         self._height = height
 
-        # create a mediapipe solution for tracking human poses
-        self._mp_pose = self._create_pose_solution()
-
 
     def _create_pose_solution(self) -> mp.python.solution_base.SolutionBase:
         solution = mp.solutions.pose.Pose(
@@ -70,6 +129,14 @@ class MotionTracker:
         return solution
 
 
+    def warm_up(self) -> None:
+        # run the model once on a blank frame so the first real frame
+        # doesn't have to wait for mediapipe to finish initializing
+        blank = np.zeros((int(self._height), int(self._width), 3), np.uint8)
+        with self._pose_lock:
+            self._mp_pose.process(blank)
+
+
     @property
     def frame(self) -> Union[np.ndarray, None]:
         with self._lock:
@@ -82,6 +149,90 @@ class MotionTracker:
             return self._landmarks
 
 
+    @property
+    def last_processed(self) -> Union[float, None]:
+        with self._lock:
+            return self._last_processed
+
+
+    @property
+    def region(self) -> Tuple[float, float]:
+        return self._region
+
+
+    @property
+    def skipped_frames(self) -> int:
+        return self._skipped_frames
+
+
+    @property
+    def processed_frames(self) -> int:
+        return self._processed_frames
+
+
+    @property
+    def motion_threshold(self) -> float:
+        return self._motion_threshold
+
+
+    @motion_threshold.setter
+    def motion_threshold(self, value: float) -> None:
+        if not isinstance(value, (int, float)):
+            raise TypeError("motion_threshold must be a float")
+        self._motion_threshold = value
+
+
+    @property
+    def mode(self) -> int:
+        return self._mode
+
+
+    @mode.setter
+    def mode(self, value: int) -> None:
+        if value not in (MODE_PAUSED, MODE_THROTTLED, MODE_FULL):
+            raise ValueError("mode must be MODE_PAUSED, MODE_THROTTLED or MODE_FULL")
+        
+        logger.debug("setting motion tracker mode to %i", value)
+        with self._lock:
+            self._mode = value
+            self._busy_time = 0.0
+            self._duty_start = time.perf_counter()
+        
+        self._wake.set()
+
+
+    @property
+    def throttle_rate(self) -> float:
+        return self._throttle_rate
+
+
+    @throttle_rate.setter
+    def throttle_rate(self, value: float) -> None:
+        if not isinstance(value, (int, float)):
+            raise TypeError("throttle_rate must be a float")
+        if value <= 0:
+            raise ValueError("throttle_rate must be a value above 0")
+        
+        self._throttle_rate = value
+        self._wake.set()
+
+
+    @property
+    def duty_cycle(self) -> float:
+        # the fraction of time spent processing frames
+        # since the current mode was set
+        with self._lock:
+            elapsed = time.perf_counter() - self._duty_start
+            if elapsed <= 0:
+                return 0.0
+            return min(1.0, self._busy_time / elapsed)
+
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
     @property
     def accuracy(self) -> int:
         return self._accuracy
@@ -92,9 +243,24 @@ class MotionTracker:
         if not value in range(3):
             raise ValueError("value must be an int value from 0 to 2")
         
+        # avoid initializing a new model if nothing changed
+        if value == self._accuracy and self._mp_pose is not None:
+            return
+        
         with self._lock:
             self._accuracy = value
-            self._mp_pose = self._create_pose_solution()
+        
+        # create the new solution before swapping it in so the tracker
+        # thread only waits for the swap and not for the model to load
+        new_pose = self._create_pose_solution()
+
+        with self._pose_lock:
+            old_pose = self._mp_pose
+            self._mp_pose = new_pose
+        
+        # no inference can still be using the old solution at this point
+        if old_pose is not None:
+            old_pose.close()
 
 
     @property
@@ -110,7 +276,10 @@ class MotionTracker:
 
 
     def _convert_landmarks(self, x: int, y: int) -> Tuple[int, int]:
-        x = round(x * self._width)
+        # landmarks are relative to the region of the frame
+        # which was processed so map them back to the full frame
+        start, end = self._region
+        x = round((start + x * (end - start)) * self._width)
         y = round(y * self._height)
 
         return x, y
@@ -126,30 +295,136 @@ class MotionTracker:
             RIGHT_WRIST:    None,
         }
 
-        results = self._mp_pose.process(frame)
+        # only process the horizontal region of the frame assigned to
+        # this tracker which allows several players to share a camera
+        if self._region == (0.0, 1.0):
+            region_frame = frame
+        else:
+            width = frame.shape[1]
+            start, end = (round(n * width) for n in self._region)
+            region_frame = np.ascontiguousarray(frame[:, start:end])
 
-        if results.pose_landmarks is not None:
-            h, w = frame.shape[:2]
+        with self._pose_lock:
+            results = self._mp_pose.process(region_frame)
 
+        if results.pose_landmarks is not None:
             for landmark in pose_landmarks.keys():
                 point = results.pose_landmarks.landmark[landmark]
                 
                 if 0 <= point.x <= 1 and 0 <= point.y <= 1:
                     landmark_pos = self._convert_landmarks(point.x, point.y)
                     pose_landmarks[landmark] = landmark_pos
-                
-                    if self._show_landmarks:
-                        cv2.circle(frame, landmark_pos, 5, self._landmarks_color, -1, cv2.LINE_AA)
 
+        if self._show_landmarks:
+            self._draw_landmarks(frame, pose_landmarks)
+
+        return frame, pose_landmarks
+
+
+    def _draw_landmarks(self, frame: np.ndarray, landmarks: dict) -> None:
+        for landmark_pos in landmarks.values():
+            if landmark_pos is not None:
+                cv2.circle(frame, landmark_pos, 5, self._landmarks_color, -1, cv2.LINE_AA)
+
+        for p1, p2 in connections:
+            point1 = landmarks[p1]
+            point2 = landmarks[p2]
+
+            if point1 is not None and point2 is not None:
+                cv2.line(frame, point1, point2, self._landmarks_color, 2, cv2.LINE_AA)
+
+
+    def _get_gate_roi(self, frame: np.ndarray) -> Tuple[int, int, int, int]:
+        # the area around the current landmarks or the entire
+        # tracked region of the frame if no landmarks are known
+        h, w = frame.shape[:2]
+        points = []
+        if self._landmarks is not None:
+            points = [p for p in self._landmarks.values() if p is not None]
+
+        if not points:
+            start, end = (round(n * w) for n in self._region)
+            return start, 0, end, h
+
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+
+        x1 = max(0, min(xs) - GATE_ROI_PADDING)
+        y1 = max(0, min(ys) - GATE_ROI_PADDING)
+        x2 = min(w, max(xs) + GATE_ROI_PADDING)
+        y2 = min(h, max(ys) + GATE_ROI_PADDING)
+
+        return x1, y1, x2, y2
+
+
+    def _sample_roi(self, frame: np.ndarray, roi: Tuple[int, int, int, int]) -> np.ndarray:
+        x1, y1, x2, y2 = roi
+        sample = cv2.resize(frame[y1:y2, x1:x2], GATE_SAMPLE_SIZE, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+
+    def _is_static(self, frame: np.ndarray) -> bool:
+        if self._motion_threshold <= 0 or self._gate_sample is None:
+            return False
+
+        # always run the inference after max_skip reused frames
+        if self._skip_count >= self._max_skip:
+            return False
+
+        sample = self._sample_roi(frame, self._gate_roi)
+        difference = np.abs(sample - self._gate_sample).mean()
+
+        return difference < self._motion_threshold
+
+
+    def process(self, frame: np.ndarray) -> None:
+        # only the processing counts towards the duty cycle, waiting
+        # for the camera to capture the next frame doesn't use the cpu
+        start = time.perf_counter()
+        self._process(frame)
+        busy = time.perf_counter() - start
+
+        with self._lock:
+            self._busy_time += busy
+
+
+    def _process(self, frame: np.ndarray) -> None:
+        # skip the pose estimation if nothing moved since the last
+        # processed frame and keep the previous landmarks instead
+        if self._is_static(frame):
             if self._show_landmarks:
-                for p1, p2 in connections:
-                    point1 = pose_landmarks[p1]
-                    point2 = pose_landmarks[p2]
+                self._draw_landmarks(frame, self._landmarks)
 
-                    if point1 is not None and point2 is not None:
-                        cv2.line(frame, point1, point2, self._landmarks_color, 2, cv2.LINE_AA)
+            self._skip_count += 1
+            self._skipped_frames += 1
 
-        return frame, pose_landmarks
+            with self._lock:
+                self._current_frame = frame
+                self._last_processed = time.perf_counter()
+            return
+
+        # keep an unmodified frame for the motion gating since
+        # landmarks might get drawn onto the processed frame
+        clean_frame = frame
+        if self._show_landmarks and self._motion_threshold > 0:
+            clean_frame = frame.copy()
+
+        # process the frame to detect pose landmarks
+        processed_frame, new_landmarks = self._process_frame(frame)
+
+        self._skip_count = 0
+        self._processed_frames += 1
+
+        # update the internal landmarks and frame while using a thread lock
+        with self._lock:
+            self._current_frame = processed_frame
+            self._landmarks = new_landmarks
+            self._last_processed = time.perf_counter()
+
+        # the reference area for the motion gating follows the new landmarks
+        if self._motion_threshold > 0:
+            self._gate_roi = self._get_gate_roi(clean_frame)
+            self._gate_sample = self._sample_roi(clean_frame, self._gate_roi)
 
 
     def update(self) -> None:
@@ -157,32 +432,284 @@ class MotionTracker:
         new_frame = self._camera.read()
 
         if new_frame is not None:
-            # process the frame to detect pose landmarks
-            processed_frame, new_landmarks = self._process_frame(new_frame)
-
-            # update the internal landmarks and frame while using a thread lock
-            with self._lock:
-                self._current_frame = processed_frame
-                self._landmarks = new_landmarks
+            self.process(new_frame)
     
 
     def _update_thread(self) -> None:
         while self._running:
+            mode = self._mode
+
+            # stop reading from the camera until the mode changes
+            if mode == MODE_PAUSED:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            start = time.perf_counter()
             self.update()
 
+            # wait out the rest of the update interval
+            if mode == MODE_THROTTLED:
+                remaining = 1 / self._throttle_rate - (time.perf_counter() - start)
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    self._wake.clear()
+
 
     def start_thread(self) -> None:
+        if self.running:
+            raise RuntimeError("motion tracker thread is already running")
+
         self._running = True
+        self._wake.clear()
+
+        with self._lock:
+            self._busy_time = 0.0
+            self._duty_start = time.perf_counter()
         
-        thread = threading.Thread(
+        self._thread = threading.Thread(
             target=self._update_thread,
             daemon=True
         )
 
-        logging.debug("starting daemon motion tracker thread")
-        thread.start()
+        logger.debug("starting daemon motion tracker thread")
+        self._thread.start()
     
     
-    def stop_thread(self) -> None:
-        logging.debug("stopping daemon motion tracker thread")
+    def stop_thread(self, timeout: float = None) -> None:
+        logger.debug("stopping daemon motion tracker thread")
+        self._running = False
+        self._wake.set()
+
+        if self._thread is None:
+            return
+
+        # wait for the current update to finish so the
+        # thread can be restarted or the camera closed
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise RuntimeError("unable to join motion tracker thread")
+        
+        self._thread = None
+
+
+class TrackerManager:
+    """Schedules pose tracking for several players and camera sources.
+
+    Every player is assigned a camera source and a horizontal region of
+    that source's frames, so players can either have a camera each or
+    share one. Instead of a thread per player a fixed number of worker
+    threads is shared between all players which keeps the cpu usage
+    bounded as players are added. Each worker always picks the idle
+    player which was scheduled the longest time ago to process next.
+    Every camera is read once per capture and the frame is shared by
+    all players assigned to it.
+
+    Exceptions:
+        - `ValueError` will be raised if workers is below 1 or a source index is unknown.
+
+    Args:
+        - `workers` (int): the number of worker threads running inference.
+        - `accuracy` (int): the model complexity used for all players.
+        - `show_landmarks` (bool): whether landmarks are drawn on the frames.
+    """
+    def __init__(self,
+            workers: int = 1,
+            accuracy: int = 1,
+            show_landmarks: bool = False,
+        ) -> None:
+
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self._lock = threading.Lock()
+
+        self._workers = workers
+        self._accuracy = accuracy
+        self._show_landmarks = show_landmarks
+
+        self._sources: List[Camera] = []
+        self._source_locks: List[threading.Lock] = []
+        self._players: List[MotionTracker] = []
+        self._player_sources: List[int] = []
+        self._busy = set()
+
+        # the latest frame read from each source together with a counter
+        # of the reads, and the counter of the frame each player last used
+        self._source_frames: List[Tuple[int, Union[np.ndarray, None]]] = []
+        self._player_frame_ids: List[int] = []
+
+        # players are scheduled by when they were last scheduled rather
+        # than processed so a failing camera can't starve other players
+        self._last_scheduled: List[Union[float, None]] = []
+
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+
+    @property
+    def player_count(self) -> int:
+        with self._lock:
+            return len(self._players)
+
+
+    def add_source(self, camera: Camera) -> int:
+        with self._lock:
+            self._sources.append(camera)
+            self._source_locks.append(threading.Lock())
+            self._source_frames.append((0, None))
+            return len(self._sources) - 1
+
+
+    def add_player(self, source: int, region: Tuple[float, float] = (0.0, 1.0)) -> int:
+        if source not in range(len(self._sources)):
+            raise ValueError("no source with index: %s" % source)
+
+        tracker = MotionTracker(
+            self._sources[source],
+            self._accuracy,
+            self._show_landmarks,
+            region=region
+        )
+
+        with self._lock:
+            self._players.append(tracker)
+            self._player_sources.append(source)
+            self._player_frame_ids.append(0)
+            self._last_scheduled.append(None)
+            return len(self._players) - 1
+
+
+    def frame(self, player: int) -> Union[np.ndarray, None]:
+        return self._players[player].frame
+
+
+    def landmarks(self, player: int) -> Union[dict, None]:
+        return self._players[player].landmarks
+
+
+    def landmarks_array(self) -> np.ndarray:
+        # publish the landmarks of every player as one array with the
+        # shape (players, landmarks, 2) where missing points are nan
+        with self._lock:
+            players = list(self._players)
+
+        array = np.full((len(players), len(tracked_landmarks), 2), np.nan)
+
+        for i, tracker in enumerate(players):
+            landmarks = tracker.landmarks
+            if landmarks is None:
+                continue
+
+            for j, landmark in enumerate(tracked_landmarks):
+                if landmarks[landmark] is not None:
+                    array[i, j] = landmarks[landmark]
+
+        return array
+
+
+    def _next_player(self) -> Union[int, None]:
+        # pick the idle player which was scheduled the longest time ago.
+        # players which were never scheduled come first and players which
+        # were scheduled at the same time are ordered by how stale their
+        # landmarks are, with players never processed first.
+        with self._lock:
+            stalest = None
+            stalest_key = None
+
+            for index, last_scheduled in enumerate(self._last_scheduled):
+                if index in self._busy:
+                    continue
+
+                last_processed = self._players[index].last_processed
+                key = (
+                    -math.inf if last_scheduled is None else last_scheduled,
+                    -math.inf if last_processed is None else last_processed,
+                )
+
+                if stalest_key is None or key < stalest_key:
+                    stalest = index
+                    stalest_key = key
+
+            if stalest is not None:
+                self._busy.add(stalest)
+                self._last_scheduled[stalest] = time.perf_counter()
+
+            return stalest
+
+
+    def _read_source(self, player: int) -> Union[np.ndarray, None]:
+        source = self._player_sources[player]
+
+        # a capture device can only be read by one thread at a time
+        with self._source_locks[source]:
+            frame_id, frame = self._source_frames[source]
+
+            # only read a new frame once the player has used the latest
+            # one, otherwise share the frame read for another player
+            if frame is None or self._player_frame_ids[player] == frame_id:
+                new_frame = self._sources[source].read()
+                if new_frame is None:
+                    return None
+                
+                frame_id, frame = frame_id + 1, new_frame
+                self._source_frames[source] = (frame_id, frame)
+
+            self._player_frame_ids[player] = frame_id
+
+        # landmarks get drawn onto the frame so each player needs a copy
+        if self._show_landmarks:
+            frame = frame.copy()
+
+        return frame
+
+
+    def update(self) -> bool:
+        player = self._next_player()
+        if player is None:
+            return False
+
+        try:
+            frame = self._read_source(player)
+            if frame is not None:
+                self._players[player].process(frame)
+        finally:
+            with self._lock:
+                self._busy.discard(player)
+
+        return True
+
+
+    def _update_thread(self) -> None:
+        while self._running:
+            # back off when every player is already being processed
+            if not self.update():
+                time.sleep(0.005)
+
+
+    def start_thread(self) -> None:
+        if self._threads:
+            raise RuntimeError("tracker manager threads are already running")
+
+        self._running = True
+
+        logger.debug("starting %i daemon tracker manager threads", self._workers)
+        for _ in range(self._workers):
+            thread = threading.Thread(
+                target=self._update_thread,
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+
+    def stop_thread(self, timeout: float = None) -> None:
+        logger.debug("stopping daemon tracker manager threads")
         self._running = False
+
+        for thread in self._threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                raise RuntimeError("unable to join tracker manager thread")
+        
+        self._threads = []
@@ -1,5 +1,7 @@
 import pygame
 
+from assets import Assets, RENDER_SCALE_STEP, snap_render_scale
+
 
 class Window:
     def __init__(self, config: dict) -> None:
@@ -18,8 +20,28 @@ class Window:
         # the pygame display gets updated.
         self._display = pygame.display.set_mode(self._resolution, pygame.FULLSCREEN | pygame.SCALED)
 
-        # convert to improve performance
-        self._display.convert_alpha()
+        # the game draws into an offscreen render target which can be smaller
+        # than the display resolution and gets scaled once per frame. with
+        # dynamic resolution enabled the render scale follows the measured
+        # frame time between min_render_scale and the configured render_scale.
+        self._max_render_scale = snap_render_scale(config.get("render_scale", 1.0))
+        self._min_render_scale = min(
+            snap_render_scale(config.get("min_render_scale", 0.5)),
+            self._max_render_scale
+        )
+        self._dynamic_resolution = config.get("dynamic_resolution", False)
+        self._render_scale = None
+        self._render_target = None
+        self._frame_time = None
+        self._frames_measured = 0
+        self.render_scale = self._max_render_scale
+
+        # pre-scale the assets for every render scale dynamic resolution
+        # can switch between so changing the scale never has to rescale
+        Assets.set_scales(self._render_scale_steps())
+
+        # the font for the splash screen is created on first use
+        self._splash_font = None
 
         # create clock to limit game framerate
         self._clock = pygame.time.Clock()
@@ -50,14 +72,119 @@ class Window:
         return self._resolution
 
 
+    @property
+    def render_scale(self) -> float:
+        return self._render_scale
+
+
+    @render_scale.setter
+    def render_scale(self, value: float) -> None:
+        if not isinstance(value, (int, float)):
+            raise TypeError("render_scale must be a float")
+        if not 0 < value <= 1:
+            raise ValueError("render_scale must be a value above 0 and at most 1")
+        
+        value = snap_render_scale(value)
+        if value == self._render_scale:
+            return
+        
+        self._render_scale = value
+
+        # at full scale the display itself is used as the render target
+        if value == 1:
+            self._render_target = self._display
+        else:
+            size = [max(1, round(n * value)) for n in self._resolution]
+
+            # convert to the display pixel format to improve blit performance
+            self._render_target = pygame.Surface(size).convert()
+
+
+    @property
+    def dynamic_resolution(self) -> bool:
+        return self._dynamic_resolution
+
+
+    @dynamic_resolution.setter
+    def dynamic_resolution(self, value: bool) -> None:
+        if not isinstance(value, bool):
+            raise TypeError("dynamic_resolution must be a bool")
+        self._dynamic_resolution = value
+        Assets.set_scales(self._render_scale_steps())
+
+
+    def _render_scale_steps(self) -> list:
+        if not self._dynamic_resolution:
+            return [self._max_render_scale]
+        
+        count = round((self._max_render_scale - self._min_render_scale) / RENDER_SCALE_STEP)
+        return [self._min_render_scale + i * RENDER_SCALE_STEP for i in range(count + 1)]
+
+
     def get_surface(self) -> pygame.Surface:
-        return self._display
+        return self._render_target
 
 
     def get_fps(self) -> int:
         return self._clock.get_fps()
 
 
+    def draw_splash(self, text: str) -> None:
+        if self._splash_font is None:
+            self._splash_font = pygame.font.Font(None, 48)
+        
+        surface = self.get_surface()
+        surface.fill((0, 0, 0))
+
+        # scale the text with the render target to keep it the same size
+        rendered = self._splash_font.render(text, True, (255, 255, 255))
+        if self._render_scale != 1:
+            w, h = rendered.get_size()
+            size = (max(1, round(w * self._render_scale)), max(1, round(h * self._render_scale)))
+            rendered = pygame.transform.smoothscale(rendered, size)
+        
+        rect = rendered.get_rect(center=surface.get_rect().center)
+        surface.blit(rendered, rect)
+
+
+    def _update_render_scale(self) -> None:
+        # smooth the time spent on the last frames excluding the time
+        # the clock waited to keep the frame cap
+        raw_time = self._clock.get_rawtime()
+        if self._frame_time is None:
+            self._frame_time = raw_time
+        else:
+            self._frame_time = 0.9 * self._frame_time + 0.1 * raw_time
+        self._frames_measured += 1
+
+        # only consider changing the render scale about once a second
+        if self._frames_measured < self._frame_cap:
+            return
+
+        budget = 1000 / self._frame_cap
+        scale = self._render_scale
+
+        if self._frame_time > budget * 0.9 and scale > self._min_render_scale:
+            scale -= RENDER_SCALE_STEP
+        elif self._frame_time < budget * 0.6 and scale < self._max_render_scale:
+            scale += RENDER_SCALE_STEP
+        else:
+            self._frames_measured = 0
+            return
+
+        self.render_scale = scale
+
+        # restart the measurement for the new render scale
+        self._frame_time = None
+        self._frames_measured = 0
+
+
     def update(self) -> None:
+        if self._render_target is not self._display:
+            pygame.transform.scale(self._render_target, self._display.get_size(), self._display)
+        
         pygame.display.update()
-        self._clock.tick(self._frame_cap)
\ No newline at end of file
+        self._clock.tick(self._frame_cap)
+
+        if self._dynamic_resolution:
+            self._update_render_scale()
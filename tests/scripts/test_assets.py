@@ -0,0 +1,88 @@
+import logging
+import tempfile
+from pathlib import Path
+
+from assets import Assets
+
+
+# build a small asset tree with a directory shared between
+# scenes and a nested directory inside of another group
+temp_dir = tempfile.TemporaryDirectory()
+root = Path(temp_dir.name)
+files = {
+    "shared/font.txt": b"font",
+    "menu/title.txt": b"title",
+    "level/map.txt": b"map",
+    "level/boss/boss.txt": b"boss",
+}
+for path, data in files.items():
+    Path(root, path).parent.mkdir(parents=True, exist_ok=True)
+    Path(root, path).write_bytes(data)
+
+Assets.set_root(root)
+Assets.load_manifest({
+    "menu": ["shared", "menu"],
+    "level": ["shared", "level", "level/boss"],
+    "broken": ["shared", "missing"],
+})
+
+# shared groups stay loaded until the last scene using them is unloaded
+Assets.load_scene("menu")
+assert Assets.scene_loaded("menu")
+assert not Assets.scene_loaded("level")
+
+Assets.load_scene("level")
+assert Assets.scene_loaded("level")
+
+Assets.unload_scene("menu")
+assert not Assets.scene_loaded("menu")
+assert Assets.get("shared/font.txt") == b"font"
+
+try:
+    Assets.get("menu/title.txt")
+    assert False, "menu assets should be unloaded"
+except ValueError:
+    pass
+
+# unloading a nested group keeps the assets its parent group holds
+Assets.unload_group("level/boss")
+assert Assets.get("level/boss/boss.txt") == b"boss"
+Assets.load_group("level/boss")
+
+Assets.unload_scene("level")
+for path in files:
+    try:
+        Assets.get(path)
+        assert False, "%s should be unloaded" % path
+    except ValueError:
+        pass
+
+
+def assert_shared_released() -> None:
+    try:
+        Assets.get("shared/font.txt")
+        assert False, "the shared group should be released"
+    except ValueError:
+        pass
+
+
+# a failing scene releases the groups it already loaded
+try:
+    Assets.load_scene("broken")
+    assert False, "loading a missing directory should fail"
+except ValueError:
+    pass
+assert_shared_released()
+
+# the failure is logged and passed on to the caller through the future
+logging.getLogger("assets").disabled = True
+future = Assets.stream_scene("broken")
+assert isinstance(future.exception(timeout=5), ValueError)
+assert_shared_released()
+
+future = Assets.stream_scene("menu")
+future.result(timeout=5)
+assert Assets.scene_loaded("menu")
+Assets.unload_scene("menu")
+
+temp_dir.cleanup()
@@ -0,0 +1,35 @@
+import time
+import logging
+
+from main import RateLimitFilter
+
+
+def make_record(msg: str, *args, level: int = logging.WARNING) -> logging.LogRecord:
+    return logging.LogRecord("camera", level, __file__, 0, msg, args, None)
+
+
+interval = 0.05
+log_filter = RateLimitFilter(interval)
+
+# repeated messages are limited by their template, not the formatted values
+results = [log_filter.filter(make_record("unable to read frame %i", i)) for i in range(1000)]
+assert results.count(True) == 1
+
+# errors are never limited
+assert all(log_filter.filter(make_record("error", level=logging.ERROR)) for _ in range(10))
+
+# the next message after the interval reports the suppressed repeats
+time.sleep(interval * 1.5)
+record = make_record("unable to read frame %i", 0)
+assert log_filter.filter(record)
+assert "suppressed 999 similar messages" in record.getMessage()
+
+# messages which aren't repeated are pruned after the interval
+for i in range(1000):
+    log_filter.filter(make_record("distinct message %i" % i))
+
+time.sleep(interval * 1.5)
+log_filter.filter(make_record("first"))
+time.sleep(interval * 2.5)
+log_filter.filter(make_record("second"))
+assert len(log_filter._last_emitted) <= 2
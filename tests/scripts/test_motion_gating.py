@@ -0,0 +1,45 @@
+import numpy as np
+
+from tracker import MotionTracker
+
+
+class FrameSource:
+    # the motion gating only needs frames passed to process
+    # so a stand-in for the camera resolution is enough
+    resolution = (320.0, 240.0)
+
+
+def make_frame(value: int) -> np.ndarray:
+    return np.full((240, 320, 3), value, np.uint8)
+
+
+frame_count = 25
+max_skip = 10
+
+# the same frame over and over only runs the inference once every max_skip + 1 frames
+tracker = MotionTracker(FrameSource(), 0, max_skip=max_skip)
+for _ in range(frame_count):
+    tracker.process(make_frame(100))
+
+assert tracker.processed_frames == 3
+assert tracker.skipped_frames == frame_count - 3
+
+# a change inside the sampled area ends the skipping
+tracker = MotionTracker(FrameSource(), 0, max_skip=max_skip)
+tracker.process(make_frame(100))
+tracker.process(make_frame(100))
+assert tracker.skipped_frames == 1
+
+tracker.process(make_frame(200))
+assert tracker.processed_frames == 2
+
+tracker.process(make_frame(200))
+assert tracker.skipped_frames == 2
+
+# a threshold of 0 turns the gating off
+tracker = MotionTracker(FrameSource(), 0, motion_threshold=0)
+for _ in range(5):
+    tracker.process(make_frame(100))
+
+assert tracker.processed_frames == 5
+assert tracker.skipped_frames == 0
@@ -3,7 +3,7 @@ from pathlib import Path
 import cv2
 
 from camera import Camera
-from tracker import MotionTracker
+from tracker import MotionTracker, MODE_PAUSED, MODE_THROTTLED, MODE_FULL
 
 accuracy = 1
 show_landmarks = True
@@ -16,6 +16,9 @@ assert tracker.accuracy == accuracy
 assert tracker.show_landmarks == show_landmarks
 
 tracker.update()
+assert tracker.processed_frames == 1
+assert tracker.skipped_frames == 0
+
 tracker.start_thread()
 
 while True:
@@ -24,5 +27,17 @@ while True:
         cv2.destroyAllWindows()
         break
 
+tracker.stop_thread()
+assert not tracker.running
+
+# restart the thread and cycle through the run modes
+tracker.start_thread()
+assert tracker.running
+
+for mode in (MODE_THROTTLED, MODE_PAUSED, MODE_FULL):
+    tracker.mode = mode
+    assert tracker.mode == mode
+    assert 0 <= tracker.duty_cycle <= 1
+
 tracker.stop_thread()
 camera.close()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import warnings
+from pathlib import Path
+
+# the window can be tested without a screen using the dummy video driver
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+warnings.filterwarnings("ignore", "no fast renderer available")
+
+import pygame
+
+from assets import Assets
+from window import Window
+
+
+config = {
+    "resolution": [640, 360],
+    "render_scale": 1.0,
+    "min_render_scale": 0.5,
+    "dynamic_resolution": True,
+}
+
+window = Window(config)
+
+# scale 1 draws straight into the display
+assert window.render_scale == 1
+assert window.get_surface() is pygame.display.get_surface()
+
+# smaller scales draw into an offscreen target
+window.render_scale = 0.5
+assert window.get_surface() is not pygame.display.get_surface()
+assert window.get_surface().get_size() == (320, 180)
+
+with tempfile.TemporaryDirectory() as root:
+    Path(root, "sprites").mkdir()
+    pygame.image.save(pygame.Surface((64, 32)), str(Path(root, "sprites", "ship.png")))
+    Path(root, "sprites", "info.txt").write_bytes(b"info")
+
+    Assets.set_root(Path(root))
+    Assets.load_group("sprites")
+
+# images are pre-scaled for every step dynamic resolution can use
+steps = [0.5, 0.625, 0.75, 0.875]
+cached = {scale: Assets.get_scaled("sprites/ship.png", scale) for scale in steps}
+assert cached[0.5][0].get_size() == (32, 16)
+
+# changing the render scale keeps the copies of the other steps
+for scale in steps + [1.0]:
+    window.render_scale = scale
+for scale in steps:
+    assert Assets.get_scaled("sprites/ship.png", scale) is cached[scale]
+
+# scales are snapped so close values share a copy
+assert Assets.get_scaled("sprites/ship.png", 0.51) is cached[0.5]
+
+# scale 1 returns the loaded frames and non-images are rejected for any scale
+assert Assets.get_scaled("sprites/ship.png", 1) is Assets.get("sprites/ship.png")
+for scale in (1, 0.5):
+    try:
+        Assets.get_scaled("sprites/info.txt", scale)
+        assert False, "non-image assets can't be scaled"
+    except ValueError:
+        pass
+
+# without dynamic resolution only the configured scale is kept
+window.dynamic_resolution = False
+for scale in steps:
+    assert (Path("sprites/ship.png"), scale) not in Assets._scaled
+
+Assets.unload_group("sprites")
+pygame.quit()
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from camera import Camera
+from tracker import TrackerManager, tracked_landmarks
+
+camera = Camera(1)
+manager = TrackerManager(workers=1, show_landmarks=True)
+
+source = manager.add_source(camera)
+left_player = manager.add_player(source, (0.0, 0.5))
+right_player = manager.add_player(source, (0.5, 1.0))
+
+assert manager.player_count == 2
+assert manager.landmarks(left_player) is None
+assert manager.landmarks_array().shape == (2, len(tracked_landmarks), 2)
+
+assert manager.update()
+assert manager.update()
+assert manager.landmarks(left_player) is not None
+assert manager.landmarks(right_player) is not None
+
+manager.start_thread()
+
+while True:
+    frames = [manager.frame(left_player), manager.frame(right_player)]
+    cv2.imshow('%s | Press Q to exit' % Path(__file__).name, np.hstack(frames))
+    if cv2.waitKey(1) & 0xFF == ord('q'):
+        cv2.destroyAllWindows()
+        break
+
+manager.stop_thread()
+camera.close()